@@ -12,11 +12,35 @@ class Settings(BaseModel):
     openai_api_key: str | None = os.environ.get("OPENAI_API_KEY")
     db_path: str = os.environ.get("DB_PATH", "notes.db")
     embedding_model: str = os.environ.get("EMBEDDING_MODEL", "text-embedding-3-small")
+    embedding_rpm: int = int(os.environ.get("EMBEDDING_RPM", "3000"))
+    embedding_tpm: int = int(os.environ.get("EMBEDDING_TPM", "1000000"))
+    embedding_max_retries: int = int(os.environ.get("EMBEDDING_MAX_RETRIES", "5"))
+
+    # Search settings
+    search_workers: int = int(os.environ.get("SEARCH_WORKERS", "1"))
+    search_shard_size: int = int(os.environ.get("SEARCH_SHARD_SIZE", "10000"))
+    index_path: str = os.environ.get("INDEX_PATH", "")
+    max_loaded_collections: int = int(os.environ.get("MAX_LOADED_COLLECTIONS", "8"))
     
     # MCP settings
     mcp_name: str = os.environ.get("MCP_NAME", "ragaman")
     mcp_transport: str = os.environ.get("MCP_TRANSPORT", "stdio")
+    mcp_http_host: str = os.environ.get("MCP_HTTP_HOST", "127.0.0.1")
     mcp_http_port: int = int(os.environ.get("MCP_HTTP_PORT", "8080"))
+    mcp_http_workers: int = int(os.environ.get("MCP_HTTP_WORKERS", "1"))
+    mcp_response_format: str = os.environ.get("MCP_RESPONSE_FORMAT", "text")
+    mcp_max_content_chars: int = int(os.environ.get("MCP_MAX_CONTENT_CHARS", "0"))
+    mcp_max_response_bytes: int = int(os.environ.get("MCP_MAX_RESPONSE_BYTES", "0"))
+
+    # Profiling settings
+    profile_dir: str = os.environ.get("PROFILE_DIR", "")
+    profile_calls: int = int(os.environ.get("PROFILE_CALLS", "0"))
+    profile_slow_ms: float = float(os.environ.get("PROFILE_SLOW_MS", "0"))
+    profile_memory: bool = os.environ.get("PROFILE_MEMORY", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
 
 
 settings = Settings()
\ No newline at end of file
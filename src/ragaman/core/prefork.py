@@ -0,0 +1,92 @@
+"""Pre-fork process supervisor for serving on multiple cores."""
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Workers that die sooner than this after starting are restarted with a delay
+MIN_WORKER_UPTIME = 1.0
+
+
+def run_prefork(
+    serve: Callable[[socket.socket], None],
+    host: str,
+    port: int,
+    workers: int,
+) -> None:
+    """Serve from several forked worker processes sharing one listening socket.
+
+    The supervisor binds the socket, forks the workers and restarts any that
+    exit unexpectedly. The kernel spreads incoming connections across the
+    workers accepting on the shared socket. SIGTERM or SIGINT stops all workers.
+
+    Args:
+        serve: Function run in each worker with the listening socket
+        host: Address to bind
+        port: Port to bind
+        workers: Number of worker processes
+    """
+    if workers < 1:
+        raise ValueError("At least one worker is required")
+
+    sock = socket.create_server((host, port), backlog=2048)
+    sock.set_inheritable(True)
+    children: dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                serve(sock)
+            except BaseException:
+                logger.exception("Worker %s failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        logger.info("Started worker %s", pid)
+        children[pid] = time.monotonic()
+
+    def stop(signum: int, frame: object) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    previous = {
+        signum: signal.signal(signum, stop)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    logger.info("Serving on %s:%s with %s workers", host, port, workers)
+    try:
+        for _ in range(workers):
+            spawn()
+
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = children.pop(pid, None)
+            if started is None or stopping:
+                continue
+
+            logger.warning("Worker %s exited with status %s, restarting", pid, status)
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(MIN_WORKER_UPTIME)
+            if not stopping:
+                spawn()
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        sock.close()
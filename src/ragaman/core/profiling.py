@@ -0,0 +1,187 @@
+"""On-demand profiling of MCP tool calls."""
+import cProfile
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class ToolProfiler:
+    """Capture cProfile stats and tracemalloc snapshots for selected tool calls.
+
+    Calls are captured when the profiler has been armed for the next N calls,
+    or, with a slow-call threshold set, whenever a call takes longer than the
+    threshold. CPU profiles are written as .prof files readable by pstats,
+    snakeviz or flameprof; memory snapshots as .tracemalloc files readable by
+    tracemalloc.Snapshot.load.
+    """
+
+    def __init__(
+        self,
+        output_dir: str | None = None,
+        slow_call_ms: float = 0,
+        memory: bool = False,
+    ) -> None:
+        """Initialize the profiler.
+
+        Args:
+            output_dir: Directory for captured profiles, None disables profiling
+            slow_call_ms: Capture any call slower than this, 0 to disable
+            memory: Also take tracemalloc snapshots of every captured call
+        """
+        self.output_dir = output_dir
+        self.slow_call_ms = slow_call_ms
+        self.memory = memory
+        self._armed_calls = 0
+        self._armed_memory = False
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        # Only one cProfile profiler can be active in a process at a time
+        self._capturing = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether profiles can be captured at all."""
+        return bool(self.output_dir)
+
+    def arm(self, calls: int, memory: bool = False) -> None:
+        """Capture the next tool calls regardless of their duration.
+
+        Args:
+            calls: Number of calls to capture
+            memory: Also take tracemalloc snapshots of these calls
+        """
+        if not self.enabled:
+            raise ValueError("Profiling is disabled, set an output directory")
+        with self._lock:
+            self._armed_calls = max(0, calls)
+            self._armed_memory = memory
+
+    def profile(self, name: str | None = None) -> Callable[[F], F]:
+        """Decorate an async tool function so its calls can be profiled.
+
+        The function is returned unchanged when profiling is disabled.
+
+        Args:
+            name: Name used in profile file names, defaults to the function name
+
+        Returns:
+            Decorator for the tool function
+        """
+
+        def decorator(func: F) -> F:
+            if not self.enabled:
+                return func
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                armed, memory = self._take_armed_call()
+                if (armed or self.slow_call_ms) and self._capturing.acquire(
+                    blocking=False
+                ):
+                    try:
+                        return await self._capture(
+                            label, func, args, kwargs, armed, memory or self.memory
+                        )
+                    finally:
+                        self._capturing.release()
+
+                if armed:
+                    # Another call is being captured; leave this one for later
+                    with self._lock:
+                        self._armed_calls += 1
+                return await func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def _take_armed_call(self) -> tuple[bool, bool]:
+        """Consume one armed call if any are left.
+
+        Returns:
+            Tuple of (whether the call is armed, whether to capture memory)
+        """
+        with self._lock:
+            if self._armed_calls <= 0:
+                return False, False
+            self._armed_calls -= 1
+            return True, self._armed_memory
+
+    async def _capture(
+        self,
+        label: str,
+        func: Callable[..., Awaitable[Any]],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        armed: bool,
+        memory: bool,
+    ) -> Any:
+        """Run a call under the profilers and write out what was captured.
+
+        Args:
+            label: Name used in profile file names
+            func: Tool function to call
+            args: Positional arguments for the call
+            kwargs: Keyword arguments for the call
+            armed: Whether the call must be written regardless of duration
+            memory: Whether to take a tracemalloc snapshot
+        """
+        trace_memory = memory and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            snapshot = tracemalloc.take_snapshot() if memory else None
+            if trace_memory:
+                tracemalloc.stop()
+
+            slow = bool(self.slow_call_ms) and elapsed_ms >= self.slow_call_ms
+            if armed or slow:
+                self._write(label, elapsed_ms, profiler, snapshot)
+
+    def _write(
+        self,
+        label: str,
+        elapsed_ms: float,
+        profiler: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot | None,
+    ) -> None:
+        """Write a captured profile to the output directory.
+
+        Args:
+            label: Name used in profile file names
+            elapsed_ms: Duration of the call in milliseconds
+            profiler: Profiler that recorded the call
+            snapshot: Memory snapshot taken at the end of the call, if any
+        """
+        assert self.output_dir is not None
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(
+            self.output_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-"
+            f"{next(self._sequence)}-{label}-{elapsed_ms:.0f}ms",
+        )
+        try:
+            profiler.dump_stats(f"{stem}.prof")
+            if snapshot is not None:
+                snapshot.dump(f"{stem}.tracemalloc")
+        except OSError as e:
+            logger.error("Failed to write profile for %s: %s", label, str(e))
+            return
+        logger.info("Profile of %s (%.1f ms) written to %s.*", label, elapsed_ms, stem)
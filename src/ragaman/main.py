@@ -21,9 +21,15 @@ def main() -> None:
         default="stdio",
         help="MCP transport method (only used when mode=mcp)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of HTTP worker processes (only used with --transport http)"
+    )
     
     args = parser.parse_args()
-    run_mcp_server(transport=args.transport)
+    run_mcp_server(transport=args.transport, workers=args.workers)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,18 @@
 """MCP server module for ragaman."""
 from ragaman.notes.embedding import OpenAIEmbedder
+from ragaman.notes.scheduler import RateLimitedEmbedder
 import logging
+import socket
 from typing import List, Optional
 
 from mcp.server.fastmcp import FastMCP
 
 from ragaman.core.config import settings
-from ragaman.notes.model import Note
+from ragaman.core.prefork import run_prefork
+from ragaman.core.profiling import ToolProfiler
+from ragaman.notes.model import DEFAULT_COLLECTION, Note
 from ragaman.notes.repository import NoteRepository
-from ragaman.schemas.note import NoteResponse, SearchResult
+from ragaman.responses import render_note, render_notes, render_search_results
 
 # Initialize FastMCP server
 mcp = FastMCP(settings.mcp_name)
@@ -20,22 +24,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Opt-in profiling of tool calls
+profiler = ToolProfiler(
+    output_dir=settings.profile_dir or None,
+    slow_call_ms=settings.profile_slow_ms,
+    memory=settings.profile_memory,
+)
+if profiler.enabled and settings.profile_calls:
+    profiler.arm(settings.profile_calls)
+
 # Get repository with embedder
-embedder = OpenAIEmbedder(
-    api_key=settings.openai_api_key,
-    model=settings.embedding_model
+embedder = RateLimitedEmbedder(
+    OpenAIEmbedder(
+        api_key=settings.openai_api_key,
+        model=settings.embedding_model,
+        max_retries=0,
+    ),
+    requests_per_minute=settings.embedding_rpm,
+    tokens_per_minute=settings.embedding_tpm,
+    max_retries=settings.embedding_max_retries,
 )
-repo = NoteRepository(
+
+
+def _create_repository(index_path: Optional[str] = None) -> NoteRepository:
+    """Create the note repository used by the MCP tools.
+
+    Args:
+        index_path: Path prefix for a memory-mapped index shared between processes
+
+    Returns:
+        The repository
+    """
+    return NoteRepository(
         db_path=settings.db_path,
         embedder=embedder,
-        create_tables=True
+        create_tables=True,
+        search_workers=settings.search_workers,
+        search_shard_size=settings.search_shard_size,
+        index_path=index_path or settings.index_path or None,
+        max_loaded_collections=settings.max_loaded_collections,
     )
 
-def _format_note(note: Note) -> str:
+
+repo = _create_repository()
+
+
+def _format_note(note: Note, max_content_chars: int | None = None) -> str:
     """Format a note into a readable string.
 
     Args:
         note: Note object to format
+        max_content_chars: Keep at most this many characters of content
 
     Returns:
         String representation of the note
@@ -44,25 +83,32 @@ def _format_note(note: Note) -> str:
         return "Invalid note with no ID"
 
     created_at = note.created_at.isoformat() if note.created_at else "Unknown time"
+    content = note.content
+    if max_content_chars and len(content) > max_content_chars:
+        content = f"{content[:max_content_chars]}... [{len(note.content)} characters]"
     return f"""
 Note ID: {note.id}
+Collection: {note.collection}
 Created: {created_at}
 Content:
-{note.content}
+{content}
 """
 
 
-def _format_search_result(result: tuple[Note, float]) -> str:
+def _format_search_result(
+    result: tuple[Note, float], max_content_chars: int | None = None
+) -> str:
     """Format a search result into a readable string.
 
     Args:
         result: Tuple of Note and similarity score
+        max_content_chars: Keep at most this many characters of content
 
     Returns:
         String representation of the search result
     """
     note, similarity = result
-    note_text = _format_note(note)
+    note_text = _format_note(note, max_content_chars)
     return f"""
 Similarity: {similarity:.4f}
 {note_text}
@@ -70,15 +116,17 @@ Similarity: {similarity:.4f}
 
 
 @mcp.tool()
-async def create_note(content: str) -> str:
+@profiler.profile()
+async def create_note(content: str, collection: str = DEFAULT_COLLECTION) -> str:
     """Create a new note with the given content.
 
     Args:
         content: The content of the note to create
+        collection: Collection to add the note to (default: 'default')
     """
-    logger.info("MCP: Creating note with content: %s", content)
+    logger.info("MCP: Creating note in %s with content: %s", collection, content)
     try:
-        note = Note(content=content)
+        note = Note(content=content, collection=collection)
         note_id = repo.add_note(note)
         created_note = repo.get_note_by_id(note_id)
 
@@ -92,34 +140,66 @@ async def create_note(content: str) -> str:
 
 
 @mcp.tool()
-async def get_note(note_id: int) -> str:
+@profiler.profile()
+async def get_note(
+    note_id: int,
+    collection: str = DEFAULT_COLLECTION,
+    response_format: str = settings.mcp_response_format,
+    fields: Optional[List[str]] = None,
+    max_content_chars: Optional[int] = settings.mcp_max_content_chars,
+    max_bytes: Optional[int] = settings.mcp_max_response_bytes,
+) -> str:
     """Get a note by its ID.
 
     Args:
         note_id: ID of the note to retrieve
+        collection: Collection the note belongs to (default: 'default')
+        response_format: 'text' for readable output or 'json' for structured output
+        fields: Note fields to include in JSON output (default: all)
+        max_content_chars: Truncate note content to this many characters (0: no limit)
+        max_bytes: Maximum size of JSON output in bytes (0: no limit)
     """
     logger.info("MCP: Getting note with ID: %s", note_id)
     try:
-        note = repo.get_note_by_id(note_id)
+        note = repo.get_note_by_id(note_id, collection)
         if not note:
-            return f"Note with ID {note_id} not found"
+            return f"Note with ID {note_id} not found in collection {collection}"
 
-        return _format_note(note)
+        if response_format == "json":
+            return render_note(note, fields, max_content_chars, max_bytes)
+        return _format_note(note, max_content_chars)
     except Exception as e:
         logger.error("Error getting note: %s", str(e))
         return f"Error getting note: {str(e)}"
 
 
 @mcp.tool()
-async def get_all_notes() -> str:
-    """Get all notes from the repository."""
-    logger.info("MCP: Getting all notes")
+@profiler.profile()
+async def get_all_notes(
+    collection: str = DEFAULT_COLLECTION,
+    response_format: str = settings.mcp_response_format,
+    fields: Optional[List[str]] = None,
+    max_content_chars: Optional[int] = settings.mcp_max_content_chars,
+    max_bytes: Optional[int] = settings.mcp_max_response_bytes,
+) -> str:
+    """Get all notes in a collection.
+
+    Args:
+        collection: Collection to list (default: 'default')
+        response_format: 'text' for readable output or 'json' for structured output
+        fields: Note fields to include in JSON output (default: all)
+        max_content_chars: Truncate note content to this many characters (0: no limit)
+        max_bytes: Maximum size of JSON output in bytes (0: no limit)
+    """
+    logger.info("MCP: Getting all notes in %s", collection)
     try:
-        notes = repo.get_all_notes()
+        notes = repo.get_all_notes(collection)
+        if response_format == "json":
+            return render_notes(notes, fields, max_content_chars, max_bytes)
         if not notes:
-            return "No notes found in the repository"
+            return f"No notes found in collection {collection}"
 
-        formatted_notes = [_format_note(note) for note in notes]
+        formatted_notes = [_format_note(note, max_content_chars) for note in notes]
         return "\n---\n".join(formatted_notes)
     except Exception as e:
         logger.error("Error getting all notes: %s", str(e))
@@ -127,17 +207,22 @@ async def get_all_notes() -> str:
 
 
 @mcp.tool()
-async def delete_note(note_id: int) -> str:
+@profiler.profile()
+async def delete_note(note_id: int, collection: str = DEFAULT_COLLECTION) -> str:
     """Delete a note by its ID.
 
     Args:
         note_id: ID of the note to delete
+        collection: Collection the note belongs to (default: 'default')
     """
     logger.info("MCP: Deleting note with ID: %s", note_id)
     try:
-        success = repo.delete_note(note_id)
+        success = repo.delete_note(note_id, collection)
         if not success:
-            return f"Note with ID {note_id} not found or could not be deleted"
+            return (
+                f"Note with ID {note_id} not found in collection {collection} "
+                "or could not be deleted"
+            )
 
         return f"Note with ID {note_id} successfully deleted"
     except Exception as e:
@@ -146,33 +231,128 @@ async def delete_note(note_id: int) -> str:
 
 
 @mcp.tool()
-async def search_notes(query: str, limit: int = 5) -> str:
+@profiler.profile()
+async def search_notes(
+    query: str,
+    limit: int = 5,
+    collection: str = DEFAULT_COLLECTION,
+    response_format: str = settings.mcp_response_format,
+    fields: Optional[List[str]] = None,
+    max_content_chars: Optional[int] = settings.mcp_max_content_chars,
+    max_bytes: Optional[int] = settings.mcp_max_response_bytes,
+) -> str:
     """Search for notes similar to the query using vector embeddings.
 
     Args:
         query: The search query
         limit: Maximum number of results to return (default: 5)
+        collection: Collection to search (default: 'default')
+        response_format: 'text' for readable output or 'json' for structured output
+        fields: Note fields to include in JSON output (default: all)
+        max_content_chars: Truncate note content to this many characters (0: no limit)
+        max_bytes: Maximum size of JSON output in bytes (0: no limit)
     """
-    logger.info("MCP: Searching notes with query: %s, limit: %s", query, limit)
+    logger.info(
+        "MCP: Searching %s with query: %s, limit: %s", collection, query, limit
+    )
     try:
-        search_results = repo.search_similar(query, limit)
+        search_results = repo.search_similar(query, limit, collection)
+        if response_format == "json":
+            return render_search_results(
+                search_results, fields, max_content_chars, max_bytes
+            )
         if not search_results:
             return "No matching notes found"
 
-        formatted_results = [_format_search_result(result) for result in search_results]
+        formatted_results = [
+            _format_search_result(result, max_content_chars)
+            for result in search_results
+        ]
         return "\n---\n".join(formatted_results)
     except Exception as e:
         logger.error("Error searching notes: %s", str(e))
         return f"Error searching notes: {str(e)}"
 
 
-def run_mcp_server(transport: Optional[str] = None) -> None:
+@mcp.tool()
+@profiler.profile()
+async def list_collections() -> str:
+    """List the collections that contain notes."""
+    logger.info("MCP: Listing collections")
+    try:
+        collections = repo.list_collections()
+        if not collections:
+            return "No collections found in the repository"
+
+        return "\n".join(collections)
+    except Exception as e:
+        logger.error("Error listing collections: %s", str(e))
+        return f"Error listing collections: {str(e)}"
+
+
+if profiler.enabled:
+
+    @mcp.tool()
+    async def profile_next_calls(count: int = 1, memory: bool = False) -> str:
+        """Capture CPU profiles of the next tool calls for diagnosing slow requests.
+
+        Args:
+            count: Number of upcoming tool calls to profile (default: 1)
+            memory: Also capture tracemalloc memory snapshots (default: False)
+        """
+        logger.info("MCP: Profiling next %s calls (memory: %s)", count, memory)
+        profiler.arm(count, memory)
+        return f"Profiling the next {count} tool calls into {profiler.output_dir}"
+
+
+def _shared_index_path() -> str:
+    """Return the index path shared by HTTP worker processes."""
+    return settings.index_path or f"{settings.db_path}.index"
+
+
+def _serve_http_worker(sock: socket.socket) -> None:
+    """Serve MCP over HTTP on an inherited socket inside a worker process.
+
+    Args:
+        sock: Listening socket shared by all workers
+    """
+    import uvicorn
+
+    global repo
+    # The parent's SQLite connection must not be used after fork
+    repo = _create_repository(_shared_index_path())
+    try:
+        config = uvicorn.Config(mcp.sse_app(), log_level="info")
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        repo.close()
+
+
+def run_mcp_server(transport: Optional[str] = None, workers: Optional[int] = None) -> None:
     """Run the MCP server.
 
     Args:
         transport: Transport method ('stdio' or 'http'), uses settings.mcp_transport if None
+        workers: Number of HTTP worker processes, uses settings.mcp_http_workers if None
     """
     transport = transport or settings.mcp_transport
+    workers = workers or settings.mcp_http_workers
     logger.info("Starting Ragaman MCP server with transport: %s", transport)
 
-    mcp.run(transport=transport)
+    if transport == "http" and workers > 1:
+        # Publish the current index once so workers start by mapping it
+        publisher = _create_repository(_shared_index_path())
+        publisher.refresh_index()
+        publisher.close()
+        run_prefork(
+            _serve_http_worker,
+            host=settings.mcp_http_host,
+            port=settings.mcp_http_port,
+            workers=workers,
+        )
+        return
+
+    try:
+        mcp.run(transport=transport)
+    finally:
+        repo.close()
@@ -1,26 +1,39 @@
 """OpenAI embedding utilities."""
 import os
+from typing import Protocol
 
 import openai
 
 
+class Embedder(Protocol):
+    """Anything that can turn text into an embedding vector."""
+
+    def embed_text(self, text: str) -> list[float]:
+        """Generate embedding for a text string."""
+        ...
+
+
 class OpenAIEmbedder:
     """Generate embeddings using OpenAI API."""
 
     def __init__(
-        self, api_key: str | None = None, model: str = "text-embedding-3-small"
+        self,
+        api_key: str | None = None,
+        model: str = "text-embedding-3-small",
+        max_retries: int = 2,
     ) -> None:
         """Initialize with API key and model.
 
         Args:
             api_key: OpenAI API key, defaults to OPENAI_API_KEY env variable
             model: OpenAI embedding model to use
+            max_retries: Retries performed by the OpenAI client itself
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
         self.model = model
-        self.client = openai.OpenAI(api_key=self.api_key)
+        self.client = openai.OpenAI(api_key=self.api_key, max_retries=max_retries)
 
     def embed_text(self, text: str) -> list[float]:
         """Generate embedding for a text string.
@@ -0,0 +1,90 @@
+"""Read-only embedding index files shared between processes."""
+import glob
+import os
+import tempfile
+
+import numpy as np
+
+
+class SharedIndex:
+    """Generation-stamped embedding index stored as memory-mappable .npy files.
+
+    Each generation of the notes table is published as a pair of files: the
+    note IDs and the matrix of unit-length embeddings. Files are written once
+    and never modified, so any number of processes can map them read-only and
+    the operating system keeps a single copy in the page cache.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the index.
+
+        Args:
+            path: Path prefix for the index files
+        """
+        self.path = path
+
+    def ids_path(self, generation: int) -> str:
+        """Return the path of the note ID file for a generation."""
+        return f"{self.path}.{generation}.ids.npy"
+
+    def vectors_path(self, generation: int) -> str:
+        """Return the path of the embedding matrix file for a generation."""
+        return f"{self.path}.{generation}.vectors.npy"
+
+    def open(self, generation: int) -> np.ndarray | None:
+        """Map the note IDs of a published generation.
+
+        Args:
+            generation: Index generation to open
+
+        Returns:
+            Read-only array of note IDs, or None if the generation is not published
+        """
+        try:
+            return np.load(self.ids_path(generation), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def publish(self, generation: int, ids: np.ndarray, matrix: np.ndarray) -> None:
+        """Write a generation and remove the files of older generations.
+
+        Files are written under temporary names and renamed into place, IDs
+        last, so readers never observe a partially written generation.
+
+        Args:
+            generation: Index generation being published
+            ids: Note ID for each row of the matrix
+            matrix: Unit-length float32 embeddings
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        for data, target in (
+            (np.asarray(matrix, dtype=np.float32), self.vectors_path(generation)),
+            (np.asarray(ids, dtype=np.int64), self.ids_path(generation)),
+        ):
+            fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, data)
+                os.replace(tmp_path, target)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        self._remove_older_than(generation)
+
+    def _remove_older_than(self, generation: int) -> None:
+        """Delete the files of generations before the given one.
+
+        Processes that already mapped an old generation keep their mapping.
+
+        Args:
+            generation: Oldest generation to keep
+        """
+        prefix = f"{self.path}."
+        for path in glob.glob(f"{glob.escape(self.path)}.*.npy"):
+            stamp = path[len(prefix):].split(".", 1)[0]
+            if stamp.isdigit() and int(stamp) < generation:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
@@ -1,20 +1,52 @@
 """Note model definition."""
+import re
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Sequence
 
+import numpy as np
 
-@dataclass
+DEFAULT_COLLECTION = "default"
+
+_COLLECTION_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def validate_collection(name: str) -> str:
+    """Check that a collection name is valid.
+
+    Names are also used in index file names, so they are limited to letters,
+    digits, underscores and hyphens.
+
+    Args:
+        name: Collection name to check
+
+    Returns:
+        The name, unchanged
+    """
+    if not _COLLECTION_NAME.fullmatch(name):
+        raise ValueError(
+            f"Invalid collection name {name!r}: use 1-64 letters, digits, '_' or '-'"
+        )
+    return name
+
+
+@dataclass(slots=True)
 class Note:
     """A simple text note with vector embedding."""
 
     content: str
     created_at: datetime | None = None
     id: int | None = None
-    embedding: list[float] | None = None
+    embedding: np.ndarray | Sequence[float] | None = None
+    collection: str = DEFAULT_COLLECTION
 
     def __post_init__(self) -> None:
-        """Set creation time if not provided."""
+        """Set creation time if not provided and store embedding as float32."""
         if self.created_at is None:
             # Using UTC for consistency, but removing tzinfo to avoid SQLite issues
             from datetime import timezone
-            self.created_at = datetime.now(timezone.utc).replace(tzinfo=None)
\ No newline at end of file
+            self.created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        if self.embedding is not None:
+            # No copy is made when given a float32 array or a view into one
+            self.embedding = np.asarray(self.embedding, dtype=np.float32)
+        validate_collection(self.collection)
\ No newline at end of file
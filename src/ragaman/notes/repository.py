@@ -1,13 +1,75 @@
 """Repository for storing and retrieving notes."""
 import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Iterator
 
 import numpy as np
-import sqlite_utils.db
 from sqlite_utils import Database
 
-from ragaman.notes.embedding import OpenAIEmbedder
-from ragaman.notes.model import Note
+from ragaman.notes.embedding import Embedder, OpenAIEmbedder
+from ragaman.notes.index import SharedIndex
+from ragaman.notes.model import DEFAULT_COLLECTION, Note, validate_collection
+from ragaman.notes.search import ShardedSearchEngine, normalize_rows, top_k
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per batch when searching without a loaded index
+STREAM_BATCH_SIZE = 1024
+
+
+def _decode_embedding(value: bytes | str | None) -> np.ndarray | None:
+    """Decode a stored embedding without copying it where possible.
+
+    Embeddings are stored as raw float32 bytes; rows written by older versions
+    hold a JSON list instead.
+
+    Args:
+        value: Raw column value
+
+    Returns:
+        A float32 array, or None if the note has no embedding
+    """
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        # Read-only view over the bytes returned by SQLite
+        return np.frombuffer(value, dtype=np.float32)
+    embedding = json.loads(value)
+    return np.asarray(embedding, dtype=np.float32) if embedding else None
+
+
+def _row_to_note(row: dict) -> Note:
+    """Build a note from a database row.
+
+    Args:
+        row: Row from the notes table
+
+    Returns:
+        The corresponding note
+    """
+    return Note(
+        id=row["id"],
+        content=row["content"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+        embedding=_decode_embedding(row["embedding"]),
+        collection=row["collection"],
+    )
+
+
+@dataclass
+class _CollectionIndex:
+    """Search index loaded for one collection."""
+
+    generation: int
+    ids: np.ndarray
+    engine: ShardedSearchEngine
 
 
 class NoteRepository:
@@ -16,36 +78,144 @@ class NoteRepository:
     def __init__(
         self,
         db_path: str = "notes.db",
-        embedder: OpenAIEmbedder | None = None,
+        embedder: Embedder | None = None,
         create_tables: bool = True,
+        search_workers: int = 1,
+        search_shard_size: int = 10_000,
+        index_path: str | None = None,
+        max_loaded_collections: int = 8,
+        query_cache_size: int = 128,
     ) -> None:
         """Initialize the repository.
 
         Args:
             db_path: Path to the SQLite database file
-            embedder: OpenAI embedder instance, will create one if not provided
+            embedder: Embedder instance, will create an OpenAIEmbedder if not provided
             create_tables: Whether to create tables if they don't exist
+            search_workers: Number of processes used to score embeddings
+            search_shard_size: Minimum number of embeddings scored per worker
+            index_path: Path prefix for a memory-mapped index shared with other
+                processes, None to keep the index private to this process
+            max_loaded_collections: Collection indexes kept loaded at once; the
+                least recently searched one is evicted beyond this
+            query_cache_size: Number of query embeddings kept for reuse
         """
         self.db_path = db_path
         self.embedder = embedder or OpenAIEmbedder()
-        self.db = Database(self.db_path)
+        # SQLite connections cannot be shared between threads
+        self._local = threading.local()
+        self._local.db = Database(self.db_path)
+        self.search_workers = max(1, search_workers)
+        self.search_shard_size = search_shard_size
+        self.index_path = index_path
+        self.max_loaded_collections = max(1, max_loaded_collections)
+        # Worker processes are shared by every collection's search engine
+        self._search_pool = (
+            ProcessPoolExecutor(max_workers=self.search_workers)
+            if self.search_workers > 1
+            else None
+        )
+        # Loaded collection indexes, least recently used first
+        self._indexes: OrderedDict[str, _CollectionIndex] = OrderedDict()
+        self.query_cache_size = query_cache_size
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        # Collections still queued for loading by a warm-up thread
+        self._warming: set[str] = set()
+        self._warm_up_thread: threading.Thread | None = None
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
 
+        if index_path is not None:
+            # Readers in other processes must not block the writer
+            self.db.enable_wal()
         if create_tables:
             self._create_tables()
 
+    @property
+    def db(self) -> Database:
+        """Database connection for the calling thread."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = Database(self.db_path)
+        return db
+
     def _create_tables(self) -> None:
         """Create required tables if they don't exist."""
         if "notes" not in self.db.table_names():
             self.db.execute(
-                """
+                f"""
                 CREATE TABLE notes (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     content TEXT NOT NULL,
                     created_at TIMESTAMP NOT NULL,
-                    embedding JSON
+                    embedding BLOB,
+                    collection TEXT NOT NULL DEFAULT '{DEFAULT_COLLECTION}'
                 )
                 """
             )
+        elif "collection" not in self.db["notes"].columns_dict:
+            self.db.execute(
+                "ALTER TABLE notes ADD COLUMN collection TEXT NOT NULL "
+                f"DEFAULT '{DEFAULT_COLLECTION}'"
+            )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_notes_collection ON notes (collection, id)"
+        )
+
+        # Superseded by the per-collection generations below
+        self.db.execute("DROP TABLE IF EXISTS index_meta")
+        if "collections" not in self.db.table_names():
+            # Per-collection counter bumped by every write to its notes
+            self.db.execute(
+                """
+                CREATE TABLE collections (
+                    name TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction.
+
+        BEGIN IMMEDIATE takes SQLite's write lock up front, so writes from every
+        process sharing the database are funnelled through a single writer.
+        Writers stamp each changed collection with a new generation using
+        _bump_generation before the transaction commits.
+
+        Yields:
+            The connection to write through
+        """
+        conn = self.db.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _bump_generation(conn: sqlite3.Connection, collection: str) -> None:
+        """Advance the index generation of a collection inside a write.
+
+        Args:
+            conn: Connection with an open write transaction
+            collection: Collection whose notes changed
+        """
+        conn.execute(
+            "INSERT INTO collections (name, generation) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET generation = generation + 1",
+            (collection,),
+        )
+
+    def _generation(self, collection: str) -> int:
+        """Return the current index generation recorded for a collection."""
+        row = self.db.execute(
+            "SELECT generation FROM collections WHERE name = ?", (collection,)
+        ).fetchone()
+        return int(row[0]) if row else 0
 
     def add_note(self, note: Note) -> int:
         """Add a new note to the repository.
@@ -56,113 +226,377 @@ class NoteRepository:
         Returns:
             The ID of the newly added note
         """
-        # Ensure note has an embedding
+        # Ensure note has a float32 embedding
         if note.embedding is None:
             note.embedding = self.embedder.embed_text(note.content)
+        note.embedding = np.asarray(note.embedding, dtype=np.float32)
 
         # Ensure note has a creation time
         if note.created_at is None:
             from datetime import timezone
             note.created_at = datetime.now(timezone.utc).replace(tzinfo=None)
 
-        # Type ignore needed for sqlite_utils Table/View union type
-        self.db["notes"].insert(
-            {
-                "content": note.content,
-                "created_at": note.created_at.isoformat(),
-                "embedding": json.dumps(note.embedding),
-            },
-            pk="id",
-        )
+        with self._write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO notes (content, created_at, embedding, collection) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    note.content,
+                    note.created_at.isoformat(),
+                    note.embedding.tobytes(),
+                    note.collection,
+                ),
+            )
+            self._bump_generation(conn, note.collection)
 
-        # Get and return the last inserted row ID
-        result = self.db.conn.execute("SELECT last_insert_rowid()").fetchone()
-        if result is not None and len(result) > 0:
-            return int(result[0])
-        raise ValueError("Failed to get ID for newly inserted note")
+        if cursor.lastrowid is None:
+            raise ValueError("Failed to get ID for newly inserted note")
+        return int(cursor.lastrowid)
 
-    def get_all_notes(self) -> list[Note]:
+    def get_all_notes(self, collection: str | None = None) -> list[Note]:
         """Retrieve all notes.
 
+        Args:
+            collection: Only return notes in this collection, None for all notes
+
         Returns:
             List of all notes
         """
-        notes = []
-        for row in self.db["notes"].rows:
-            notes.append(
-                Note(
-                    id=row["id"],
-                    content=row["content"],
-                    created_at=datetime.fromisoformat(row["created_at"]),
-                    embedding=(
-                        json.loads(row["embedding"]) if row["embedding"] else None
-                    ),
-                )
-            )
-        return notes
+        if collection is None:
+            return [_row_to_note(row) for row in self.db["notes"].rows]
+        # Type ignore needed for sqlite_utils Table/View union type
+        rows = self.db["notes"].rows_where(  # type: ignore
+            "collection = ?", [validate_collection(collection)], order_by="id"
+        )
+        return [_row_to_note(row) for row in rows]
 
-    def get_note_by_id(self, note_id: int) -> Note | None:
+    def get_note_by_id(
+        self, note_id: int, collection: str | None = None
+    ) -> Note | None:
         """Retrieve a note by ID.
 
         Args:
             note_id: ID of the note to retrieve
+            collection: Only return the note if it belongs to this collection
 
         Returns:
             The note if found, None otherwise
         """
-        try:
-            # Type ignore needed for sqlite_utils Table/View union type
-            row = self.db["notes"].get(note_id)  # type: ignore
-            return Note(
-                id=row["id"],
-                content=row["content"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-                embedding=json.loads(row["embedding"]) if row["embedding"] else None,
-            )
-        except sqlite_utils.db.NotFoundError:
+        # Type ignore needed for sqlite_utils Table/View union type
+        rows = list(self.db["notes"].rows_where("id = ?", [note_id]))  # type: ignore
+        if not rows:
             return None
+        note = _row_to_note(rows[0])
+        if collection is not None and note.collection != collection:
+            return None
+        return note
+
+    def list_collections(self) -> list[str]:
+        """List the collections that contain notes.
+
+        Returns:
+            Sorted collection names
+        """
+        return [
+            row[0]
+            for row in self.db.execute(
+                "SELECT DISTINCT collection FROM notes ORDER BY collection"
+            ).fetchall()
+        ]
 
-    def search_similar(self, query: str, limit: int = 5) -> list[tuple[Note, float]]:
+    def search_similar(
+        self, query: str, limit: int = 5, collection: str = DEFAULT_COLLECTION
+    ) -> list[tuple[Note, float]]:
         """Search for notes similar to the query text.
 
+        While a warm-up thread is still loading the collection's index, the
+        search streams over the stored embeddings instead of waiting for it.
+
         Args:
             query: Text to search for
             limit: Maximum number of results to return
+            collection: Collection to search
 
         Returns:
             List of (note, similarity_score) tuples, sorted by decreasing similarity
         """
-        query_embedding = self.embedder.embed_text(query)
+        validate_collection(collection)
+        query_embedding = self._embed_query(query)
+
+        with self._lock:
+            warming = collection in self._warming
+        if warming:
+            hits = self._search_streaming(query_embedding, limit, collection)
+        else:
+            index = self._load_index(collection)
+            hits = [
+                (int(index.ids[row]), similarity)
+                for row, similarity in index.engine.search(query_embedding, limit)
+            ]
 
         results = []
-        for note in self.get_all_notes():
-            if note.embedding:
-                # Calculate cosine similarity
-                similarity = np.dot(query_embedding, note.embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(note.embedding)
-                )
-                results.append((note, float(similarity)))
+        for note_id, similarity in hits:
+            note = self.get_note_by_id(note_id)
+            if note is not None:
+                results.append((note, similarity))
+
+        return results
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a search query, reusing recent embeddings of the same text.
 
-        # Sort by similarity score in descending order
-        results.sort(key=lambda x: x[1], reverse=True)
+        Args:
+            query: Text to embed
+
+        Returns:
+            Float32 query embedding
+        """
+        with self._lock:
+            embedding = self._query_cache.get(query)
+            if embedding is not None:
+                self._query_cache.move_to_end(query)
+                return embedding
+
+        embedding = np.asarray(self.embedder.embed_text(query), dtype=np.float32)
+        if self.query_cache_size > 0:
+            with self._lock:
+                self._query_cache[query] = embedding
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return embedding
+
+    def _search_streaming(
+        self, query_embedding: np.ndarray, limit: int, collection: str
+    ) -> list[tuple[int, float]]:
+        """Exact search that scores stored embeddings batch by batch.
+
+        Nothing is cached, so this path is cheap to start but pays the full
+        read from the database on every call.
+
+        Args:
+            query_embedding: Query embedding
+            limit: Maximum number of results to return
+            collection: Collection to search
+
+        Returns:
+            List of (note ID, cosine similarity) tuples, best first
+        """
+        query = normalize_rows(query_embedding.reshape(1, -1))[0]
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+
+        cursor = self.db.execute(
+            "SELECT id, embedding FROM notes "
+            "WHERE collection = ? AND embedding IS NOT NULL ORDER BY id",
+            (collection,),
+        )
+        while rows := cursor.fetchmany(STREAM_BATCH_SIZE):
+            ids = []
+            embeddings = []
+            for note_id, value in rows:
+                embedding = _decode_embedding(value)
+                if embedding is not None:
+                    ids.append(note_id)
+                    embeddings.append(embedding)
+            if not embeddings:
+                continue
 
-        return results[:limit]
+            scores = normalize_rows(np.vstack(embeddings)) @ query
+            candidate_ids = np.concatenate([best_ids, np.array(ids, dtype=np.int64)])
+            candidate_scores = np.concatenate([best_scores, scores])
+            keep = top_k(candidate_scores, limit)
+            best_ids, best_scores = candidate_ids[keep], candidate_scores[keep]
 
-    def delete_note(self, note_id: int) -> bool:
+        return [(int(i), float(score)) for i, score in zip(best_ids, best_scores)]
+
+    def warm_up(
+        self,
+        collections: list[str] | None = None,
+        queries: list[str] | None = None,
+    ) -> threading.Thread:
+        """Load search indexes and query embeddings in a background thread.
+
+        Searches in a collection that has not been loaded yet use the
+        streaming exact path until the thread gets to it.
+
+        Args:
+            collections: Collections to load, defaults to the existing ones up
+                to max_loaded_collections
+            queries: Frequent queries whose embeddings to prefetch
+
+        Returns:
+            The started warm-up thread
+        """
+        if collections is None:
+            collections = self.list_collections()[: self.max_loaded_collections]
+        collections = [validate_collection(name) for name in collections]
+        with self._lock:
+            self._warming.update(collections)
+
+        thread = threading.Thread(
+            target=self._run_warm_up,
+            args=(collections, queries or []),
+            name="ragaman-warm-up",
+            daemon=True,
+        )
+        self._warm_up_thread = thread
+        thread.start()
+        return thread
+
+    def _run_warm_up(self, collections: list[str], queries: list[str]) -> None:
+        """Body of the warm-up thread.
+
+        Args:
+            collections: Collections to load
+            queries: Queries whose embeddings to prefetch
+        """
+        try:
+            for collection in collections:
+                if self._closing.is_set():
+                    return
+                try:
+                    self._load_index(collection)
+                except Exception as e:
+                    logger.error("Failed to warm up %s: %s", collection, str(e))
+                finally:
+                    with self._lock:
+                        self._warming.discard(collection)
+                logger.info("Warmed up search index for %s", collection)
+
+            for query in queries:
+                if self._closing.is_set():
+                    return
+                try:
+                    self._embed_query(query)
+                except Exception as e:
+                    logger.error("Failed to prefetch query %r: %s", query, str(e))
+        finally:
+            with self._lock:
+                self._warming.difference_update(collections)
+
+    def refresh_index(self, collection: str = DEFAULT_COLLECTION) -> None:
+        """Load the latest generation of a collection's index if it has changed.
+
+        Args:
+            collection: Collection whose index to load
+        """
+        self._load_index(validate_collection(collection))
+
+    def _load_index(self, collection: str) -> _CollectionIndex:
+        """Load the current generation of a collection's embeddings.
+
+        The generation counter is checked on every call, so changes made by
+        this or any other process are picked up by the next search. Indexes
+        are loaded on demand and the least recently used one is evicted once
+        more than max_loaded_collections are loaded.
+
+        Args:
+            collection: Collection whose index to load
+
+        Returns:
+            The loaded index
+        """
+        generation = self._generation(collection)
+        with self._lock:
+            index = self._indexes.get(collection)
+            if index is not None and index.generation == generation:
+                self._indexes.move_to_end(collection)
+                return index
+
+        shared_index = (
+            SharedIndex(f"{self.index_path}.{collection}") if self.index_path else None
+        )
+        ids = shared_index.open(generation) if shared_index is not None else None
+        if ids is None:
+            generation, ids, matrix = self._read_embeddings(collection)
+            if shared_index is not None:
+                shared_index.publish(generation, ids, normalize_rows(matrix))
+                ids = shared_index.open(generation)
+
+        engine = ShardedSearchEngine(
+            workers=self.search_workers,
+            min_shard_size=self.search_shard_size,
+            pool=self._search_pool,
+        )
+        if shared_index is not None:
+            engine.load_mapped(shared_index.vectors_path(generation))
+        else:
+            engine.load(matrix)
+
+        index = _CollectionIndex(generation, ids, engine)
+        with self._lock:
+            # Replaced and evicted engines may still be serving a search in
+            # another thread; they release their memory once no longer used
+            self._indexes.pop(collection, None)
+            self._indexes[collection] = index
+            while len(self._indexes) > self.max_loaded_collections:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _read_embeddings(self, collection: str) -> tuple[int, np.ndarray, np.ndarray]:
+        """Read a collection's embeddings from a consistent snapshot.
+
+        Args:
+            collection: Collection to read
+
+        Returns:
+            Tuple of (generation, note IDs, embedding matrix)
+        """
+        conn = self.db.conn
+        conn.execute("BEGIN")
+        try:
+            generation = self._generation(collection)
+            rows = conn.execute(
+                "SELECT id, embedding FROM notes "
+                "WHERE collection = ? AND embedding IS NOT NULL ORDER BY id",
+                (collection,),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+
+        ids = []
+        embeddings = []
+        for note_id, value in rows:
+            embedding = _decode_embedding(value)
+            if embedding is not None:
+                ids.append(note_id)
+                embeddings.append(embedding)
+
+        matrix = (
+            np.vstack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+        )
+        return generation, np.array(ids, dtype=np.int64), matrix
+
+    def delete_note(self, note_id: int, collection: str | None = None) -> bool:
         """Delete a note by ID.
 
         Args:
             note_id: ID of the note to delete
+            collection: Only delete the note if it belongs to this collection
 
         Returns:
             True if the note was deleted, False if it didn't exist
         """
-        if not self.get_note_by_id(note_id):
-            return False
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT collection FROM notes WHERE id = ?", (note_id,)
+            ).fetchone()
+            if row is None or (collection is not None and row[0] != collection):
+                return False
+            conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+            self._bump_generation(conn, row[0])
+        return True
 
-        try:
-            # Type ignore needed for sqlite_utils Table/View union type
-            self.db["notes"].delete(note_id)  # type: ignore
-            return True
-        except sqlite_utils.db.NotFoundError:
-            return False
+    def close(self) -> None:
+        """Release search workers and shared memory held by the repository."""
+        self._closing.set()
+        if self._warm_up_thread is not None:
+            self._warm_up_thread.join()
+            self._warm_up_thread = None
+        with self._lock:
+            for index in self._indexes.values():
+                index.engine.close()
+            self._indexes.clear()
+        if self._search_pool is not None:
+            self._search_pool.shutdown()
+            self._search_pool = None
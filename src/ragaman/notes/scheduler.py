@@ -0,0 +1,230 @@
+"""Rate-limit-aware scheduling of embedding requests."""
+import logging
+import math
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+import openai
+
+from ragaman.notes.embedding import Embedder
+
+logger = logging.getLogger(__name__)
+
+# OpenAI tokenizers average roughly four characters of English text per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens an input will be billed for.
+
+    Args:
+        text: Text to be embedded
+
+    Returns:
+        Approximate token count, at least 1
+    """
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate_per_minute: Tokens added to the bucket per minute
+            capacity: Maximum tokens held, defaults to one minute of refill
+            clock: Monotonic clock returning seconds
+            sleep: Function used to wait for tokens
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until the requested number of tokens can be taken.
+
+        Requests larger than the capacity are admitted once the bucket is full,
+        leaving it in debt so later callers wait for the excess to refill.
+
+        Args:
+            amount: Number of tokens to take
+        """
+        needed = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return
+                wait = (needed - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class RateLimitedEmbedder:
+    """Embedder wrapper that paces requests and retries transient failures.
+
+    Requests are admitted through request-per-minute and token-per-minute
+    buckets. Rate limit, server and connection errors are retried with jittered
+    exponential backoff, honouring any Retry-After header sent by the API.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            embedder: Embedder that performs the actual requests
+            requests_per_minute: Request limit, None or 0 for no limit
+            tokens_per_minute: Input token limit, None or 0 for no limit
+            max_retries: Retries before a transient error is raised
+            base_delay: Backoff before the first retry, in seconds
+            max_delay: Upper bound for a single backoff, in seconds
+            clock: Monotonic clock returning seconds
+            sleep: Function used to wait
+        """
+        self.embedder = embedder
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._requests = (
+            TokenBucket(requests_per_minute, clock=clock, sleep=sleep)
+            if requests_per_minute
+            else None
+        )
+        self._tokens = (
+            TokenBucket(tokens_per_minute, clock=clock, sleep=sleep)
+            if tokens_per_minute
+            else None
+        )
+        # Set when the API asks every caller to back off
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def embed_text(self, text: str) -> list[float]:
+        """Generate embedding for a text string within the configured limits.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            List of embedding values
+        """
+        tokens = estimate_tokens(text)
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_capacity(tokens)
+            try:
+                return self.embedder.embed_text(text)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                logger.warning(
+                    "Embedding request failed (%s), retrying in %.2fs", e, delay
+                )
+                with self._lock:
+                    self._resume_at = max(self._resume_at, self._clock() + delay)
+
+        raise AssertionError("unreachable")
+
+    def _wait_for_capacity(self, tokens: int) -> None:
+        """Block until a request of the given size may be sent.
+
+        Args:
+            tokens: Estimated input tokens of the request
+        """
+        with self._lock:
+            wait = self._resume_at - self._clock()
+        if wait > 0:
+            self._sleep(wait)
+        if self._requests is not None:
+            self._requests.acquire(1)
+        if self._tokens is not None:
+            self._tokens.acquire(tokens)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float | None:
+        """Work out how long to wait before retrying a failed request.
+
+        Args:
+            error: Exception raised by the embedder
+            attempt: Zero-based number of the failed attempt
+
+        Returns:
+            Delay in seconds, or None if the error should not be retried
+        """
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code != 429 and error.status_code < 500:
+                return None
+            retry_after = _parse_retry_after(error.response.headers)
+            if retry_after is not None:
+                return min(retry_after, self.max_delay)
+        elif not isinstance(error, openai.APIConnectionError):
+            return None
+
+        # Full jitter spreads retries from concurrent callers apart
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def _parse_retry_after(headers: object) -> float | None:
+    """Read the server-requested retry delay from response headers.
+
+    Args:
+        headers: Response headers mapping
+
+    Returns:
+        Delay in seconds, or None if the headers do not specify one
+    """
+    get = getattr(headers, "get", None)
+    if get is None:
+        return None
+
+    retry_after_ms = get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,258 @@
+"""Exact vector search over an in-memory embedding matrix."""
+import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Matrix sources attached by the current worker process, oldest first
+_attached: "OrderedDict[tuple[str, str], tuple[np.ndarray, object]]" = OrderedDict()
+# Sources kept attached at once, enough for several collections' indexes
+MAX_ATTACHED = 16
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row of a matrix to unit length.
+
+    Rows with a zero norm are left as zeros so they score 0 against any query.
+
+    Args:
+        matrix: 2-D array of embeddings
+
+    Returns:
+        A float32 array of the same shape with unit-length rows
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the positions of the k highest scores, best first.
+
+    Args:
+        scores: 1-D array of similarity scores
+        k: Number of positions to return
+
+    Returns:
+        Array of indices into scores, sorted by decreasing score
+    """
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _attach(source: tuple[str, str], shape: tuple[int, int]) -> np.ndarray:
+    """Map a shared embedding matrix into the current worker process.
+
+    Args:
+        source: ("shm", block name) or ("file", path of a .npy file)
+        shape: Shape of the full matrix
+
+    Returns:
+        The matrix, backed by shared memory or a read-only memory map
+    """
+    attached = _attached.get(source)
+    if attached is not None:
+        _attached.move_to_end(source)
+    else:
+        # Sources of replaced index generations eventually age out
+        while len(_attached) >= MAX_ATTACHED:
+            _, (matrix, handle) = _attached.popitem(last=False)
+            # The array must be released before its shared memory can be closed
+            del matrix
+            if isinstance(handle, shared_memory.SharedMemory):
+                handle.close()
+
+        kind, name = source
+        if kind == "shm":
+            shm = shared_memory.SharedMemory(name=name)
+            attached = (np.ndarray(shape, dtype=np.float32, buffer=shm.buf), shm)
+        else:
+            attached = (np.load(name, mmap_mode="r"), None)
+        _attached[source] = attached
+    return attached[0]
+
+
+def _score_shard(
+    source: tuple[str, str],
+    shape: tuple[int, int],
+    start: int,
+    stop: int,
+    query: np.ndarray,
+    k: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Score one shard of a shared embedding matrix inside a worker process.
+
+    Args:
+        source: Where the matrix lives, see _attach
+        shape: Shape of the full matrix
+        start: First row of the shard
+        stop: One past the last row of the shard
+        query: Unit-length query vector
+        k: Number of results to keep from this shard
+
+    Returns:
+        Tuple of (row indices into the full matrix, scores) for the shard's top k
+    """
+    matrix = _attach(source, shape)
+    scores = matrix[start:stop] @ query
+    best = top_k(scores, k)
+    return best + start, scores[best]
+
+
+class ShardedSearchEngine:
+    """Exact cosine search that spreads scoring across a pool of processes.
+
+    The normalized embedding matrix is copied once into a shared memory block,
+    or read straight from a memory-mapped .npy file. Each search splits the
+    rows into contiguous shards, scores them in worker processes without
+    copying the matrix, and merges the per-shard top-k lists.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        min_shard_size: int = 10_000,
+        pool: ProcessPoolExecutor | None = None,
+    ) -> None:
+        """Initialize the engine.
+
+        Args:
+            workers: Maximum number of worker processes
+            min_shard_size: Smallest number of rows worth sending to a worker;
+                matrices with fewer rows than two shards are scored in-process
+            pool: Worker pool shared with other engines, created on first use
+                and owned by this engine if not provided
+        """
+        if workers < 1:
+            raise ValueError("At least one search worker is required")
+        self.workers = workers
+        self.min_shard_size = max(1, min_shard_size)
+        self._pool = pool
+        self._owns_pool = pool is None
+        self._shm: shared_memory.SharedMemory | None = None
+        self._source: tuple[str, str] | None = None
+        self._matrix: np.ndarray | None = None
+
+    @property
+    def size(self) -> int:
+        """Number of rows currently loaded."""
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    def load(self, matrix: np.ndarray) -> None:
+        """Replace the searchable matrix.
+
+        Args:
+            matrix: 2-D array of embeddings, one row per document
+        """
+        normalized = normalize_rows(matrix)
+        self._release_matrix()
+
+        if self.workers == 1 or normalized.size == 0:
+            self._matrix = normalized
+            return
+
+        self._shm = shared_memory.SharedMemory(create=True, size=normalized.nbytes)
+        self._source = ("shm", self._shm.name)
+        self._matrix = np.ndarray(
+            normalized.shape, dtype=np.float32, buffer=self._shm.buf
+        )
+        self._matrix[:] = normalized
+
+    def load_mapped(self, path: str) -> None:
+        """Replace the searchable matrix with a memory-mapped .npy file.
+
+        The file must hold a float32 matrix whose rows are already unit length.
+        Nothing is copied: this process and the search workers map the file.
+
+        Args:
+            path: Path of the .npy file
+        """
+        matrix = np.load(path, mmap_mode="r")
+        if matrix.dtype != np.float32 or matrix.ndim != 2:
+            raise ValueError(f"{path} does not hold a 2-D float32 matrix")
+        self._release_matrix()
+        self._matrix = matrix
+        self._source = ("file", path)
+
+    def search(self, query: np.ndarray, limit: int) -> list[tuple[int, float]]:
+        """Find the rows most similar to the query.
+
+        Args:
+            query: Query embedding
+            limit: Maximum number of results to return
+
+        Returns:
+            List of (row index, cosine similarity) tuples, best first
+        """
+        if self._matrix is None or self.size == 0 or limit <= 0:
+            return []
+
+        query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        shards = min(self.workers, math.ceil(self.size / self.min_shard_size))
+
+        if shards <= 1 or self._source is None:
+            scores = self._matrix @ query
+            best = top_k(scores, limit)
+            return [(int(i), float(scores[i])) for i in best]
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        bounds = np.linspace(0, self.size, shards + 1, dtype=int)
+        futures = [
+            self._pool.submit(
+                _score_shard,
+                self._source,
+                self._matrix.shape,
+                int(start),
+                int(stop),
+                query,
+                limit,
+            )
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+
+        rows = []
+        scores = []
+        for future in futures:
+            shard_rows, shard_scores = future.result()
+            rows.append(shard_rows)
+            scores.append(shard_scores)
+
+        merged_rows = np.concatenate(rows)
+        merged_scores = np.concatenate(scores)
+        best = top_k(merged_scores, limit)
+        return [(int(merged_rows[i]), float(merged_scores[i])) for i in best]
+
+    def close(self) -> None:
+        """Shut down the worker pool and free the shared matrix."""
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown()
+            self._pool = None
+        self._release_matrix()
+
+    def __del__(self) -> None:
+        """Free the shared matrix once the engine is no longer referenced."""
+        if not hasattr(self, "_matrix"):
+            # __init__ did not complete
+            return
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown(wait=False)
+        self._release_matrix()
+
+    def _release_matrix(self) -> None:
+        """Drop the current matrix and unlink its shared memory block."""
+        self._matrix = None
+        self._source = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
@@ -0,0 +1,269 @@
+"""Structured, size-bounded JSON rendering of notes for MCP tool responses."""
+from typing import Any, Iterable, TypeVar
+
+from pydantic import BaseModel
+
+from ragaman.notes.model import Note
+from ragaman.schemas.note import (
+    NoteListResponse,
+    NoteResponse,
+    SearchResponse,
+    SearchResult,
+)
+
+NOTE_FIELDS = frozenset(NoteResponse.model_fields)
+
+ItemT = TypeVar("ItemT", NoteResponse, SearchResult)
+
+
+def note_to_response(note: Note, max_content_chars: int | None = None) -> NoteResponse:
+    """Convert a note into its response schema.
+
+    Args:
+        note: Note to convert, must have an ID
+        max_content_chars: Keep at most this many characters of content
+
+    Returns:
+        The note response, with a content snippet if the content was cut
+    """
+    if note.id is None or note.created_at is None:
+        raise ValueError("Only stored notes can be converted to a response")
+
+    content = note.content
+    truncated = bool(max_content_chars) and len(content) > max_content_chars
+    return NoteResponse(
+        id=note.id,
+        content=content[:max_content_chars] if truncated else content,
+        collection=note.collection,
+        created_at=note.created_at,
+        content_length=len(content),
+        truncated=truncated,
+    )
+
+
+def select_fields(fields: Iterable[str] | None) -> set[str] | None:
+    """Validate a field selection against the note response schema.
+
+    Args:
+        fields: Requested note fields, None for all fields
+
+    Returns:
+        The set of fields to include, or None for all fields
+    """
+    if not fields:
+        return None
+    selected = set(fields) - {"similarity"}
+    unknown = selected - NOTE_FIELDS
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Available fields: {', '.join(sorted(NOTE_FIELDS))}"
+        )
+    return selected
+
+
+def render_note(
+    note: Note,
+    fields: Iterable[str] | None = None,
+    max_content_chars: int | None = None,
+    max_bytes: int | None = None,
+) -> str:
+    """Render a single note as JSON.
+
+    Args:
+        note: Note to render
+        fields: Note fields to include, None for all fields
+        max_content_chars: Keep at most this many characters of content
+        max_bytes: Upper bound for the encoded response size
+
+    Returns:
+        JSON document for the note
+    """
+    include = select_fields(fields)
+    response = note_to_response(note, max_content_chars)
+    if max_bytes and _encoded_size(response, include) > max_bytes:
+        response = _shrink_content(response, max_bytes, include) or response
+    return response.model_dump_json(include=include)
+
+
+def render_notes(
+    notes: list[Note],
+    fields: Iterable[str] | None = None,
+    max_content_chars: int | None = None,
+    max_bytes: int | None = None,
+) -> str:
+    """Render a list of notes as a size-bounded JSON document.
+
+    Args:
+        notes: Notes to render
+        fields: Note fields to include, None for all fields
+        max_content_chars: Keep at most this many characters of content per note
+        max_bytes: Upper bound for the encoded response size
+
+    Returns:
+        JSON document following the NoteListResponse schema
+    """
+    include = select_fields(fields)
+    items = [note_to_response(note, max_content_chars) for note in notes]
+    kept, truncated = _fit_items(
+        items,
+        include,
+        lambda kept, truncated: NoteListResponse(
+            notes=kept, total=len(items), truncated=truncated
+        ),
+        "notes",
+        max_bytes,
+    )
+    return NoteListResponse(
+        notes=kept, total=len(items), truncated=truncated
+    ).model_dump_json(include=_envelope_include("notes", include))
+
+
+def render_search_results(
+    results: list[tuple[Note, float]],
+    fields: Iterable[str] | None = None,
+    max_content_chars: int | None = None,
+    max_bytes: int | None = None,
+) -> str:
+    """Render search results as a size-bounded JSON document.
+
+    Args:
+        results: (note, similarity) tuples, best first
+        fields: Note fields to include, None for all fields
+        max_content_chars: Keep at most this many characters of content per note
+        max_bytes: Upper bound for the encoded response size
+
+    Returns:
+        JSON document following the SearchResponse schema
+    """
+    note_include = select_fields(fields)
+    include = {
+        "note": note_include if note_include is not None else True,
+        "similarity": True,
+    }
+    items = [
+        SearchResult(
+            note=note_to_response(note, max_content_chars), similarity=similarity
+        )
+        for note, similarity in results
+    ]
+    kept, truncated = _fit_items(
+        items,
+        include,
+        lambda kept, truncated: SearchResponse(
+            results=kept, total=len(items), truncated=truncated
+        ),
+        "results",
+        max_bytes,
+    )
+    return SearchResponse(
+        results=kept, total=len(items), truncated=truncated
+    ).model_dump_json(include=_envelope_include("results", include))
+
+
+def _envelope_include(key: str, item_include: Any) -> dict[str, Any]:
+    """Build the include specification for a list response.
+
+    Args:
+        key: Name of the list field in the envelope
+        item_include: Include specification for each item, None for everything
+
+    Returns:
+        Include specification for the envelope model
+    """
+    return {
+        key: {"__all__": item_include if item_include is not None else True},
+        "total": True,
+        "truncated": True,
+    }
+
+
+def _fit_items(
+    items: list[ItemT],
+    include: Any,
+    envelope: Any,
+    key: str,
+    max_bytes: int | None,
+) -> tuple[list[ItemT], bool]:
+    """Keep as many items as fit in the byte budget.
+
+    The first item that does not fit has its content shortened to use up the
+    remaining budget; any items after it are dropped.
+
+    Args:
+        items: Items in output order
+        include: Include specification for each item
+        envelope: Callable building the envelope model from (items, truncated)
+        key: Name of the list field in the envelope
+        max_bytes: Upper bound for the encoded response size, None for no limit
+
+    Returns:
+        Tuple of (items to render, whether anything was cut)
+    """
+    truncated = any(_note_of(item).truncated for item in items)
+    if not max_bytes:
+        return items, truncated
+
+    # Reserve room for the envelope itself, including the longer "true" flag
+    used = len(
+        envelope([], True)
+        .model_dump_json(include=_envelope_include(key, include))
+        .encode()
+    )
+    kept: list[ItemT] = []
+    for item in items:
+        separator = 1 if kept else 0
+        size = _encoded_size(item, include) + separator
+        if used + size > max_bytes:
+            shrunk = _shrink_content(item, max_bytes - used - separator, include)
+            if shrunk is not None:
+                kept.append(shrunk)
+            return kept, True
+        kept.append(item)
+        used += size
+
+    return kept, truncated
+
+
+def _shrink_content(item: ItemT, budget: int, include: Any) -> ItemT | None:
+    """Shorten an item's note content so the item fits in a byte budget.
+
+    Args:
+        item: Note response or search result
+        budget: Maximum encoded size of the item
+        include: Include specification for the item
+
+    Returns:
+        The shortened item, or None if it cannot fit even without content
+    """
+
+    def with_content(content: str) -> ItemT:
+        note = _note_of(item).model_copy(
+            update={"content": content, "truncated": True}
+        )
+        if isinstance(item, SearchResult):
+            return item.model_copy(update={"note": note})
+        return note
+
+    content = _note_of(item).content
+    if _encoded_size(with_content(""), include) > budget:
+        return None
+
+    cut = len(content)
+    while cut > 0:
+        candidate = with_content(content[:cut])
+        size = _encoded_size(candidate, include)
+        if size <= budget:
+            return candidate
+        cut = min(cut - 1, cut * budget // size)
+    return with_content("")
+
+
+def _note_of(item: NoteResponse | SearchResult) -> NoteResponse:
+    """Return the note response held by an item."""
+    return item.note if isinstance(item, SearchResult) else item
+
+
+def _encoded_size(model: BaseModel, include: Any) -> int:
+    """Return the UTF-8 size of a model's JSON encoding."""
+    return len(model.model_dump_json(include=include).encode())
@@ -8,6 +8,7 @@ class NoteBase(BaseModel):
     """Base schema for a note."""
 
     content: str = Field(..., description="The content of the note")
+    collection: str = Field("default", description="Collection holding the note")
 
 
 class NoteCreate(NoteBase):
@@ -21,13 +22,20 @@ class NoteResponse(NoteBase):
 
     id: int = Field(..., description="The ID of the note")
     created_at: datetime = Field(..., description="Creation timestamp")
+    content_length: int | None = Field(
+        None, description="Length of the full content in characters"
+    )
+    truncated: bool = Field(False, description="Whether the content was shortened")
 
     model_config = {
         "json_schema_extra": {
             "example": {
                 "id": 1,
                 "content": "This is a sample note about RAG models.",
-                "created_at": "2023-01-01T12:00:00"
+                "collection": "default",
+                "created_at": "2023-01-01T12:00:00",
+                "content_length": 39,
+                "truncated": False
             }
         }
     }
@@ -38,12 +46,14 @@ class SearchQuery(BaseModel):
 
     query: str = Field(..., description="The search query text")
     limit: int = Field(5, description="Maximum number of results to return")
+    collection: str = Field("default", description="Collection to search")
 
     model_config = {
         "json_schema_extra": {
             "example": {
                 "query": "RAG models",
-                "limit": 5
+                "limit": 5,
+                "collection": "default"
             }
         }
     }
@@ -61,9 +71,30 @@ class SearchResult(BaseModel):
                 "note": {
                     "id": 1,
                     "content": "This is a sample note about RAG models.",
+                    "collection": "default",
                     "created_at": "2023-01-01T12:00:00"
                 },
                 "similarity": 0.89
             }
         }
-    }
\ No newline at end of file
+    }
+
+
+class NoteListResponse(BaseModel):
+    """Schema for a size-bounded list of notes."""
+
+    notes: list[NoteResponse]
+    total: int = Field(..., description="Number of notes before any were omitted")
+    truncated: bool = Field(
+        False, description="Whether notes or content were cut to fit the size budget"
+    )
+
+
+class SearchResponse(BaseModel):
+    """Schema for a size-bounded list of search results."""
+
+    results: list[SearchResult]
+    total: int = Field(..., description="Number of results before any were omitted")
+    truncated: bool = Field(
+        False, description="Whether results or content were cut to fit the size budget"
+    )
\ No newline at end of file
@@ -0,0 +1 @@
+# Test core package
\ No newline at end of file
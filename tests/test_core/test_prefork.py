@@ -0,0 +1,57 @@
+"""Tests for the pre-fork supervisor."""
+import os
+import select
+import signal
+import socket
+import time
+
+import pytest
+
+from ragaman.core.prefork import run_prefork
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+
+
+def test_run_prefork_rejects_zero_workers() -> None:
+    """Test that at least one worker is required."""
+    with pytest.raises(ValueError, match="At least one worker"):
+        run_prefork(lambda sock: None, "127.0.0.1", 0, workers=0)
+
+
+def test_run_prefork_starts_workers_on_shared_socket() -> None:
+    """Test that every worker receives the listening socket and stops on SIGTERM."""
+    read_fd, write_fd = os.pipe()
+    workers = 3
+
+    def serve(sock: socket.socket) -> None:
+        os.write(write_fd, f"{os.getpid()} {sock.getsockname()[1]}\n".encode())
+        time.sleep(30)
+
+    supervisor = os.fork()
+    if supervisor == 0:
+        code = 0
+        try:
+            run_prefork(serve, "127.0.0.1", 0, workers=workers)
+        except BaseException:
+            code = 1
+        os._exit(code)
+
+    os.close(write_fd)
+    buffer = b""
+    try:
+        while buffer.count(b"\n") < workers:
+            ready, _, _ = select.select([read_fd], [], [], 10)
+            assert ready, "workers did not start"
+            buffer += os.read(read_fd, 1024)
+    finally:
+        os.kill(supervisor, signal.SIGTERM)
+        _, status = os.waitpid(supervisor, 0)
+        os.close(read_fd)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    reports = buffer.decode().splitlines()
+    assert len({report.split()[0] for report in reports}) == workers
+    assert len({report.split()[1] for report in reports}) == 1
+    for report in reports:
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(report.split()[0]), 0)
@@ -0,0 +1,79 @@
+"""Tests for the tool call profiler."""
+import asyncio
+import os
+import pstats
+import tracemalloc
+
+import pytest
+
+from ragaman.core.profiling import ToolProfiler
+
+
+async def _tool(value: int) -> int:
+    """Example tool returning its argument doubled."""
+    return value * 2
+
+
+def test_disabled_profiler_returns_function_unchanged() -> None:
+    """Test that profiling adds no wrapper when disabled."""
+    profiler = ToolProfiler()
+
+    assert profiler.profile()(_tool) is _tool
+    with pytest.raises(ValueError, match="Profiling is disabled"):
+        profiler.arm(1)
+
+
+def test_wrapper_preserves_signature() -> None:
+    """Test that wrapped tools keep their name and docstring for MCP."""
+    profiled = ToolProfiler(output_dir="unused").profile()(_tool)
+
+    assert profiled.__name__ == "_tool"
+    assert profiled.__doc__ == _tool.__doc__
+    assert profiled.__wrapped__ is _tool  # type: ignore[attr-defined]
+
+
+def test_unarmed_calls_are_not_captured(tmp_path: object) -> None:
+    """Test that nothing is written until the profiler is armed."""
+    profiled = ToolProfiler(output_dir=str(tmp_path)).profile()(_tool)
+
+    assert asyncio.run(profiled(2)) == 4
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_armed_calls_are_captured(tmp_path: object) -> None:
+    """Test that exactly the armed number of calls is profiled."""
+    profiler = ToolProfiler(output_dir=str(tmp_path))
+    profiled = profiler.profile("double")(_tool)
+    profiler.arm(2, memory=True)
+
+    for value in range(3):
+        assert asyncio.run(profiled(value)) == value * 2
+
+    files = sorted(os.listdir(str(tmp_path)))
+    profiles = [name for name in files if name.endswith(".prof")]
+    snapshots = [name for name in files if name.endswith(".tracemalloc")]
+    assert len(profiles) == 2
+    assert len(snapshots) == 2
+    assert all("-double-" in name for name in files)
+
+    stats = pstats.Stats(os.path.join(str(tmp_path), profiles[0]))
+    assert any(func[2] == "_tool" for func in stats.stats)  # type: ignore[attr-defined]
+    tracemalloc.Snapshot.load(os.path.join(str(tmp_path), snapshots[0]))
+    assert not tracemalloc.is_tracing()
+
+
+def test_slow_calls_are_captured(tmp_path: object) -> None:
+    """Test that calls over the slow threshold are profiled automatically."""
+
+    async def slow_tool() -> None:
+        await asyncio.sleep(0.02)
+
+    fast_profiler = ToolProfiler(output_dir=str(tmp_path), slow_call_ms=10_000)
+    asyncio.run(fast_profiler.profile()(slow_tool)())
+    assert os.listdir(str(tmp_path)) == []
+
+    slow_profiler = ToolProfiler(output_dir=str(tmp_path), slow_call_ms=1)
+    asyncio.run(slow_profiler.profile()(slow_tool)())
+    files = os.listdir(str(tmp_path))
+    assert len(files) == 1
+    assert files[0].endswith(".prof")
@@ -0,0 +1,44 @@
+"""Tests for the shared memory-mapped index."""
+import os
+
+import numpy as np
+
+from ragaman.notes.index import SharedIndex
+
+
+def test_open_missing_generation(tmp_path: object) -> None:
+    """Test that unpublished generations cannot be opened."""
+    index = SharedIndex(os.path.join(str(tmp_path), "notes.index"))
+
+    assert index.open(1) is None
+
+
+def test_publish_and_open(tmp_path: object) -> None:
+    """Test that published generations are mapped read-only."""
+    index = SharedIndex(os.path.join(str(tmp_path), "notes.index"))
+    matrix = np.eye(2, dtype=np.float32)
+
+    index.publish(3, np.array([10, 20]), matrix)
+    ids = index.open(3)
+
+    assert ids is not None
+    assert ids.tolist() == [10, 20]
+    assert not ids.flags.writeable
+    vectors = np.load(index.vectors_path(3), mmap_mode="r")
+    assert vectors.tolist() == matrix.tolist()
+
+
+def test_publish_removes_older_generations(tmp_path: object) -> None:
+    """Test that publishing a generation cleans up the ones before it."""
+    index = SharedIndex(os.path.join(str(tmp_path), "notes.index"))
+    matrix = np.eye(2, dtype=np.float32)
+
+    index.publish(1, np.array([1, 2]), matrix)
+    index.publish(2, np.array([1, 2]), matrix)
+
+    assert index.open(1) is None
+    assert index.open(2) is not None
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "notes.index.2.ids.npy",
+        "notes.index.2.vectors.npy",
+    ]
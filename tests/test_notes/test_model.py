@@ -1,6 +1,9 @@
 """Tests for the Note model."""
 from datetime import datetime
 
+import numpy as np
+import pytest
+
 from ragaman.notes.model import Note
 
 
@@ -28,5 +31,31 @@ def test_note_with_all_attributes() -> None:
     
     assert note.content == "Test note with all attributes"
     assert note.id == 42
-    assert note.embedding == embedding
-    assert note.created_at == created_at
\ No newline at end of file
+    assert note.embedding.tolist() == pytest.approx(embedding)
+    assert note.created_at == created_at
+
+
+def test_note_stores_embedding_as_float32_array() -> None:
+    """Test that embeddings are held as float32 arrays without extra copies."""
+    embedding = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+
+    note = Note(content="Test note", embedding=embedding)
+    from_list = Note(content="Test note", embedding=[0.1, 0.2, 0.3])
+
+    assert note.embedding is embedding
+    assert from_list.embedding.dtype == np.float32
+
+
+def test_note_uses_slots() -> None:
+    """Test that notes do not carry a per-instance __dict__."""
+    note = Note(content="Test note")
+
+    assert not hasattr(note, "__dict__")
+
+def test_note_collection() -> None:
+    """Test that notes default to the default collection and validate names."""
+    assert Note(content="Test note").collection == "default"
+    assert Note(content="Test note", collection="work-1").collection == "work-1"
+
+    with pytest.raises(ValueError, match="Invalid collection name"):
+        Note(content="Test note", collection="has space")
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Generator
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from ragaman.notes.model import Note
@@ -53,7 +54,7 @@ def test_add_note_with_embedding(temp_db_path: str, mock_embedder: MagicMock) ->
     saved_note = repo.get_note_by_id(note_id)
     assert saved_note is not None
     assert saved_note.content == "Test note"
-    assert saved_note.embedding == embedding
+    assert saved_note.embedding.tolist() == pytest.approx(embedding)
     # Embedder should not have been called
     mock_embedder.embed_text.assert_not_called()
 
@@ -71,7 +72,7 @@ def test_add_note_without_embedding(temp_db_path: str, mock_embedder: MagicMock)
     saved_note = repo.get_note_by_id(note_id)
     assert saved_note is not None
     assert saved_note.content == "Test note without embedding"
-    assert saved_note.embedding == [0.1, 0.2, 0.3]
+    assert saved_note.embedding.tolist() == pytest.approx([0.1, 0.2, 0.3])
     # Embedder should have been called with the note content
     mock_embedder.embed_text.assert_called_once_with("Test note without embedding")
 
@@ -96,6 +97,27 @@ def test_get_all_notes(temp_db_path: str, mock_embedder: MagicMock) -> None:
     assert notes[1].content == "Note 2"
 
 
+def test_get_note_by_id_reads_legacy_json_embedding(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that embeddings stored as JSON by older versions are still readable."""
+    repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
+    repo.db["notes"].insert(
+        {
+            "content": "Legacy note",
+            "created_at": datetime(2023, 1, 1).isoformat(),
+            "embedding": json.dumps([0.5, 0.6, 0.7]),
+        }
+    )
+
+    note = repo.get_note_by_id(1)
+
+    assert note is not None
+    assert note.embedding.dtype == np.float32
+    assert note.embedding.tolist() == pytest.approx([0.5, 0.6, 0.7])
+    assert [n.content for n, _ in repo.search_similar("query")] == ["Legacy note"]
+
+
 def test_get_note_by_id(temp_db_path: str, mock_embedder: MagicMock) -> None:
     """Test retrieving a note by ID."""
     repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
@@ -186,4 +208,190 @@ def test_search_similar(temp_db_path: str, mock_embedder: MagicMock) -> None:
     expected_similarity_1 = np.dot(query_embedding, [0.9, 0.1, 0.1]) / (
         np.linalg.norm(query_embedding) * np.linalg.norm([0.9, 0.1, 0.1])
     )
-    assert results[0][1] == pytest.approx(expected_similarity_1)
\ No newline at end of file
+    assert results[0][1] == pytest.approx(expected_similarity_1)
+
+def test_search_similar_with_multiple_workers(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that sharded search returns the same ranking as a single process."""
+    repo = NoteRepository(
+        db_path=temp_db_path,
+        embedder=mock_embedder,
+        search_workers=2,
+        search_shard_size=1,
+    )
+    try:
+        repo.add_note(Note(content="Note 1", embedding=[0.9, 0.1, 0.1]))
+        repo.add_note(Note(content="Note 2", embedding=[0.1, 0.9, 0.1]))
+        repo.add_note(Note(content="Note 3", embedding=[0.1, 0.1, 0.9]))
+
+        mock_embedder.embed_text.return_value = [0.8, 0.1, 0.2]
+        results = repo.search_similar("test query", limit=2)
+    finally:
+        repo.close()
+
+    assert [note.content for note, _ in results] == ["Note 1", "Note 3"]
+
+
+def test_search_similar_sees_new_and_deleted_notes(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that the cached search index is refreshed after writes."""
+    repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
+    mock_embedder.embed_text.return_value = [1.0, 0.0, 0.0]
+
+    first_id = repo.add_note(Note(content="Note 1", embedding=[1.0, 0.0, 0.0]))
+    assert len(repo.search_similar("query")) == 1
+
+    repo.add_note(Note(content="Note 2", embedding=[0.0, 1.0, 0.0]))
+    assert len(repo.search_similar("query")) == 2
+
+    repo.delete_note(first_id)
+    results = repo.search_similar("query")
+    assert [note.content for note, _ in results] == ["Note 2"]
+
+
+def test_shared_index_is_reused_across_repositories(
+    temp_db_path: str, mock_embedder: MagicMock, tmp_path: object
+) -> None:
+    """Test that repositories sharing an index see each other's writes."""
+    index_path = os.path.join(str(tmp_path), "notes.index")
+    writer = NoteRepository(
+        db_path=temp_db_path, embedder=mock_embedder, index_path=index_path
+    )
+    reader = NoteRepository(
+        db_path=temp_db_path, embedder=mock_embedder, index_path=index_path
+    )
+    mock_embedder.embed_text.return_value = [1.0, 0.0, 0.0]
+
+    writer.add_note(Note(content="Note 1", embedding=[1.0, 0.0, 0.0]))
+    assert [n.content for n, _ in reader.search_similar("query")] == ["Note 1"]
+
+    # The reader published the index; the writer maps the same files
+    writer.search_similar("query")
+    writer_index = writer._indexes["default"]
+    assert writer_index.generation == reader._indexes["default"].generation
+
+    writer.add_note(Note(content="Note 2", embedding=[0.0, 1.0, 0.0]))
+    results = reader.search_similar("query")
+    assert [n.content for n, _ in results] == ["Note 1", "Note 2"]
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "notes.index.default.2.ids.npy",
+        "notes.index.default.2.vectors.npy",
+    ]
+
+    reader.close()
+    writer.close()
+
+
+def test_failed_write_does_not_advance_generation(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that a rolled back write leaves the index generation unchanged."""
+    repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
+    generation = repo._generation("default")
+
+    with pytest.raises(RuntimeError):
+        with repo._write() as conn:
+            conn.execute(
+                "INSERT INTO notes (content, created_at) VALUES (?, ?)",
+                ("Note", datetime(2023, 1, 1).isoformat()),
+            )
+            raise RuntimeError("boom")
+
+    assert repo._generation("default") == generation
+    assert repo.get_all_notes() == []
+
+
+def test_collections_are_searched_separately(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that searches only score notes in the requested collection."""
+    repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
+    mock_embedder.embed_text.return_value = [1.0, 0.0, 0.0]
+
+    repo.add_note(Note(content="Default note", embedding=[1.0, 0.0, 0.0]))
+    work_id = repo.add_note(
+        Note(content="Work note", embedding=[0.9, 0.1, 0.0], collection="work")
+    )
+
+    assert [n.content for n, _ in repo.search_similar("query")] == ["Default note"]
+    results = repo.search_similar("query", collection="work")
+    assert [n.content for n, _ in results] == ["Work note"]
+    assert results[0][0].collection == "work"
+
+    assert repo.list_collections() == ["default", "work"]
+    assert [n.content for n in repo.get_all_notes("work")] == ["Work note"]
+    assert len(repo.get_all_notes()) == 2
+    assert repo.get_note_by_id(work_id, collection="default") is None
+    assert repo.delete_note(work_id, collection="default") is False
+    assert repo.delete_note(work_id, collection="work") is True
+    assert repo.search_similar("query", collection="work") == []
+
+
+def test_collection_indexes_are_evicted(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that only the most recently searched collections stay loaded."""
+    repo = NoteRepository(
+        db_path=temp_db_path, embedder=mock_embedder, max_loaded_collections=2
+    )
+    for collection in ("a", "b", "c"):
+        repo.add_note(Note(content=collection, collection=collection))
+
+    repo.search_similar("query", collection="a")
+    repo.search_similar("query", collection="b")
+    repo.search_similar("query", collection="a")
+    repo.search_similar("query", collection="c")
+
+    assert list(repo._indexes) == ["a", "c"]
+
+
+def test_writes_only_invalidate_their_collection(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that a write to one collection keeps other indexes loaded."""
+    repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
+    repo.add_note(Note(content="a", collection="a"))
+    repo.search_similar("query", collection="a")
+    loaded = repo._indexes["a"]
+
+    repo.add_note(Note(content="b", collection="b"))
+    repo.search_similar("query", collection="a")
+
+    assert repo._indexes["a"] is loaded
+
+
+def test_invalid_collection_name(temp_db_path: str, mock_embedder: MagicMock) -> None:
+    """Test that collection names are validated."""
+    repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
+
+    with pytest.raises(ValueError, match="Invalid collection name"):
+        repo.search_similar("query", collection="../etc")
+
+
+def test_existing_notes_table_gets_collection_column(
+    temp_db_path: str, mock_embedder: MagicMock
+) -> None:
+    """Test that databases created before collections are migrated."""
+    import sqlite3
+
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "content TEXT NOT NULL, created_at TIMESTAMP NOT NULL, embedding JSON)"
+    )
+    conn.execute(
+        "INSERT INTO notes (content, created_at, embedding) VALUES (?, ?, ?)",
+        ("Old note", datetime(2023, 1, 1).isoformat(), json.dumps([1.0, 0.0])),
+    )
+    conn.commit()
+    conn.close()
+
+    repo = NoteRepository(db_path=temp_db_path, embedder=mock_embedder)
+    mock_embedder.embed_text.return_value = [1.0, 0.0]
+
+    note = repo.get_note_by_id(1)
+    assert note is not None
+    assert note.collection == "default"
+    assert [n.content for n, _ in repo.search_similar("query")] == ["Old note"]
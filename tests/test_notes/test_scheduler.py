@@ -0,0 +1,128 @@
+"""Tests for the rate-limited embedding scheduler."""
+from unittest.mock import MagicMock
+
+import httpx
+import openai
+import pytest
+
+from ragaman.notes.scheduler import RateLimitedEmbedder, TokenBucket, estimate_tokens
+
+
+class FakeClock:
+    """Clock that only advances when sleep is called."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _status_error(
+    status: int, headers: dict[str, str] | None = None
+) -> openai.APIStatusError:
+    """Build an OpenAI status error for the given HTTP status."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    error_class = openai.RateLimitError if status == 429 else openai.APIStatusError
+    return error_class("error", response=response, body=None)
+
+
+def test_estimate_tokens() -> None:
+    """Test that token estimates scale with text length."""
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("abcd" * 10) == 10
+
+
+def test_token_bucket_waits_for_refill() -> None:
+    """Test that the bucket blocks once its capacity is used up."""
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire(60)
+    assert clock.now == 0
+
+    bucket.acquire(2)
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_token_bucket_admits_oversized_request() -> None:
+    """Test that a request larger than the capacity does not deadlock."""
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire(120)
+    bucket.acquire(1)
+    assert clock.now == pytest.approx(61.0)
+
+
+def test_rate_limited_embedder_paces_requests() -> None:
+    """Test that requests are spread out to stay under the RPM limit."""
+    clock = FakeClock()
+    inner = MagicMock()
+    inner.embed_text.return_value = [0.1]
+    embedder = RateLimitedEmbedder(
+        inner, requests_per_minute=2, clock=clock, sleep=clock.sleep
+    )
+
+    for _ in range(3):
+        embedder.embed_text("text")
+
+    assert inner.embed_text.call_count == 3
+    assert clock.now == pytest.approx(30.0)
+
+
+def test_rate_limited_embedder_honours_retry_after() -> None:
+    """Test that a 429 is retried after the server-requested delay."""
+    clock = FakeClock()
+    inner = MagicMock()
+    inner.embed_text.side_effect = [_status_error(429, {"retry-after": "7"}), [0.1]]
+    embedder = RateLimitedEmbedder(inner, clock=clock, sleep=clock.sleep)
+
+    assert embedder.embed_text("text") == [0.1]
+    assert clock.sleeps == [pytest.approx(7.0)]
+
+
+def test_rate_limited_embedder_backs_off_on_server_error() -> None:
+    """Test that 5xx errors are retried with bounded exponential backoff."""
+    clock = FakeClock()
+    inner = MagicMock()
+    inner.embed_text.side_effect = [_status_error(500), _status_error(503), [0.1]]
+    embedder = RateLimitedEmbedder(
+        inner, base_delay=1.0, clock=clock, sleep=clock.sleep
+    )
+
+    assert embedder.embed_text("text") == [0.1]
+    assert len(clock.sleeps) == 2
+    assert 0 <= clock.sleeps[0] <= 1.0
+    assert 0 <= clock.sleeps[1] <= 2.0
+
+
+def test_rate_limited_embedder_gives_up_after_max_retries() -> None:
+    """Test that the last transient error is raised once retries run out."""
+    clock = FakeClock()
+    inner = MagicMock()
+    inner.embed_text.side_effect = _status_error(429)
+    embedder = RateLimitedEmbedder(
+        inner, max_retries=2, clock=clock, sleep=clock.sleep
+    )
+
+    with pytest.raises(openai.RateLimitError):
+        embedder.embed_text("text")
+    assert inner.embed_text.call_count == 3
+
+
+def test_rate_limited_embedder_does_not_retry_client_errors() -> None:
+    """Test that non-transient errors are raised immediately."""
+    inner = MagicMock()
+    inner.embed_text.side_effect = _status_error(400)
+    embedder = RateLimitedEmbedder(inner)
+
+    with pytest.raises(openai.APIStatusError):
+        embedder.embed_text("text")
+    assert inner.embed_text.call_count == 1
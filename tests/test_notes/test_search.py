@@ -0,0 +1,102 @@
+"""Tests for the sharded search engine."""
+import numpy as np
+import pytest
+
+from ragaman.notes.search import ShardedSearchEngine, normalize_rows, top_k
+
+
+def test_top_k_returns_best_positions_in_order() -> None:
+    """Test that top_k returns the highest scores in decreasing order."""
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+
+    assert top_k(scores, 2).tolist() == [1, 3]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 0]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_normalize_rows_handles_zero_vectors() -> None:
+    """Test that zero rows stay zero instead of producing NaNs."""
+    normalized = normalize_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+
+    assert normalized[0] == pytest.approx([0.6, 0.8])
+    assert normalized[1].tolist() == [0.0, 0.0]
+
+
+def test_engine_rejects_zero_workers() -> None:
+    """Test that the engine requires at least one worker."""
+    with pytest.raises(ValueError, match="At least one search worker"):
+        ShardedSearchEngine(workers=0)
+
+
+def test_search_empty_engine() -> None:
+    """Test that searching an empty engine returns no results."""
+    engine = ShardedSearchEngine(workers=1)
+    engine.load(np.empty((0, 0)))
+
+    assert engine.search(np.array([1.0, 0.0]), 5) == []
+
+
+def test_sharded_search_matches_single_process() -> None:
+    """Test that sharded search returns the same results as in-process scoring."""
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(200, 16))
+    query = rng.normal(size=16)
+
+    single = ShardedSearchEngine(workers=1)
+    sharded = ShardedSearchEngine(workers=3, min_shard_size=50)
+    try:
+        single.load(matrix)
+        sharded.load(matrix)
+
+        expected = single.search(query, 10)
+        results = sharded.search(query, 10)
+    finally:
+        single.close()
+        sharded.close()
+
+    assert [row for row, _ in results] == [row for row, _ in expected]
+    assert [score for _, score in results] == pytest.approx(
+        [score for _, score in expected]
+    )
+    # Scores are cosine similarities
+    best_row, best_score = results[0]
+    expected_score = np.dot(matrix[best_row], query) / (
+        np.linalg.norm(matrix[best_row]) * np.linalg.norm(query)
+    )
+    assert best_score == pytest.approx(expected_score, rel=1e-5)
+
+
+def test_sharded_search_over_mapped_file(tmp_path: object) -> None:
+    """Test that workers can score a memory-mapped matrix file."""
+    import os
+
+    rng = np.random.default_rng(1)
+    matrix = normalize_rows(rng.normal(size=(100, 8)))
+    query = rng.normal(size=8)
+    path = os.path.join(str(tmp_path), "vectors.npy")
+    np.save(path, matrix)
+
+    single = ShardedSearchEngine(workers=1)
+    sharded = ShardedSearchEngine(workers=2, min_shard_size=10)
+    try:
+        single.load(matrix)
+        sharded.load_mapped(path)
+
+        expected = single.search(query, 5)
+        results = sharded.search(query, 5)
+    finally:
+        single.close()
+        sharded.close()
+
+    assert [row for row, _ in results] == [row for row, _ in expected]
+
+
+def test_load_mapped_rejects_non_float32(tmp_path: object) -> None:
+    """Test that only float32 matrices can be memory-mapped."""
+    import os
+
+    path = os.path.join(str(tmp_path), "vectors.npy")
+    np.save(path, np.eye(2))
+
+    with pytest.raises(ValueError, match="2-D float32 matrix"):
+        ShardedSearchEngine(workers=1).load_mapped(path)
@@ -0,0 +1,102 @@
+"""Tests for structured MCP tool responses."""
+import json
+from datetime import datetime
+
+import pytest
+
+from ragaman.notes.model import Note
+from ragaman.responses import (
+    note_to_response,
+    render_note,
+    render_notes,
+    render_search_results,
+)
+
+
+def _note(note_id: int, content: str) -> Note:
+    """Create a stored note for rendering."""
+    return Note(id=note_id, content=content, created_at=datetime(2023, 1, 1, 12, 0))
+
+
+def test_note_to_response_truncates_content() -> None:
+    """Test that long content is cut to a snippet and flagged."""
+    response = note_to_response(_note(1, "abcdefghij"), max_content_chars=4)
+
+    assert response.content == "abcd"
+    assert response.content_length == 10
+    assert response.truncated is True
+
+
+def test_note_to_response_requires_id() -> None:
+    """Test that unsaved notes cannot be rendered."""
+    with pytest.raises(ValueError, match="Only stored notes"):
+        note_to_response(Note(content="unsaved"))
+
+
+def test_render_note_with_field_selection() -> None:
+    """Test that only the requested fields are rendered."""
+    data = json.loads(render_note(_note(1, "content"), fields=["id", "content"]))
+
+    assert data == {"id": 1, "content": "content"}
+
+
+def test_render_note_rejects_unknown_fields() -> None:
+    """Test that unknown fields raise a helpful error."""
+    with pytest.raises(ValueError, match="Unknown fields: embedding"):
+        render_note(_note(1, "content"), fields=["embedding"])
+
+
+def test_render_note_fits_byte_budget() -> None:
+    """Test that a large note is shortened to fit the byte budget."""
+    rendered = render_note(_note(1, "x" * 10_000), max_bytes=200)
+    data = json.loads(rendered)
+
+    assert len(rendered.encode()) <= 200
+    assert data["truncated"] is True
+    assert data["content_length"] == 10_000
+    assert data["content"] == "x" * len(data["content"])
+
+
+def test_render_notes_without_budget() -> None:
+    """Test that all notes are rendered when no budget is set."""
+    data = json.loads(render_notes([_note(1, "one"), _note(2, "two")]))
+
+    assert [note["id"] for note in data["notes"]] == [1, 2]
+    assert data["total"] == 2
+    assert data["truncated"] is False
+
+
+def test_render_notes_drops_notes_over_budget() -> None:
+    """Test that notes beyond the byte budget are omitted."""
+    notes = [_note(i, "é" * 100) for i in range(1, 11)]
+
+    rendered = render_notes(notes, max_bytes=700)
+    data = json.loads(rendered)
+
+    assert len(rendered.encode()) <= 700
+    assert 0 < len(data["notes"]) < 10
+    assert data["total"] == 10
+    assert data["truncated"] is True
+
+
+def test_render_search_results_keeps_similarity() -> None:
+    """Test that search results always include their similarity score."""
+    results = [(_note(1, "one"), 0.9), (_note(2, "two"), 0.5)]
+
+    data = json.loads(render_search_results(results, fields=["id"]))
+
+    assert data["results"] == [
+        {"note": {"id": 1}, "similarity": 0.9},
+        {"note": {"id": 2}, "similarity": 0.5},
+    ]
+    assert data["total"] == 2
+
+
+def test_render_search_results_flags_snippets() -> None:
+    """Test that content snippets mark the response as truncated."""
+    results = [(_note(1, "a long note"), 0.9)]
+
+    data = json.loads(render_search_results(results, max_content_chars=6))
+
+    assert data["results"][0]["note"]["content"] == "a long"
+    assert data["truncated"] is True